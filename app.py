@@ -1,17 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from cachetools import TTLCache
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+from pydantic_core import PydanticCustomError
 from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 from functools import wraps
 import re
 from datetime import datetime, timedelta
 import os
+import sys
 from bson import ObjectId
 import uuid
 import logging
+import threading
+import time
+import orjson
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which encodes datetime natively"""
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configure logging based on environment
 ENV = os.getenv('ENVIRONMENT', 'development')
@@ -32,13 +57,63 @@ CORS(app, origins=[
 # Environment-based configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback-secret-key-change-in-production')
 
+# Shared JWT codec and pre-encoded signing key, built once instead of per call
+JWT_ALGORITHM = 'HS256'
+_jwt = jwt.PyJWT(options={'require': ['exp', 'user_id']})
+_jwt_key = app.config['SECRET_KEY'].encode()
+
+# Password hashing cost (werkzeug defaults to 600k PBKDF2 iterations).
+# Existing hashes keep verifying at whatever cost they were created with.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:150000')
+
+# Fail the deploy on a bad method instead of 500ing every registration later
+try:
+    generate_password_hash('startup-check', method=PASSWORD_HASH_METHOD)
+except ValueError as e:
+    raise RuntimeError(f"Invalid PASSWORD_HASH_METHOD {PASSWORD_HASH_METHOD!r}: {e}") from e
+
 # MongoDB connection with secure error handling
 MONGO_URI = os.getenv('MONGO_URI', 'xxxxxxxxxxxxxx')
 
+# Validation patterns compiled once at import
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGIT_PATTERN = re.compile(r'\D')
+
+# Fields returned by the product list; the full description is only served by get_product
+PRODUCT_LIST_PROJECTION = {
+    'id': 1,
+    'title': 1,
+    'price': 1,
+    'image': 1,
+    'createdAt': 1,
+    'createdBy': 1
+}
+
+def ensure_indexes(collection, indexes):
+    """Create only the indexes missing from the collection (one listing round-trip)"""
+    existing = collection.index_information()
+    for name, keys, options in indexes:
+        if name not in existing:
+            collection.create_index(keys, name=name, **options)
+
 def init_database():
     """Initialize database connection with secure error handling"""
+    client = None
     try:
-        client = MongoClient(MONGO_URI)
+        # Explicit pool sizing and timeouts so workers keep warm connections
+        # and fail fast instead of hanging on an unreachable cluster
+        client = MongoClient(
+            MONGO_URI,
+            maxPoolSize=200,
+            minPoolSize=10,
+            maxIdleTimeMS=300_000,
+            serverSelectionTimeoutMS=3000,
+            socketTimeoutMS=45_000,
+            connectTimeoutMS=10_000,
+            retryWrites=True,
+            w='majority',
+            appname='tutorial-7'
+        )
         # Test connection without exposing URI
         client.admin.command('ping')
 
@@ -51,8 +126,14 @@ def init_database():
 
         # Create indexes safely
         try:
-            users_collection.create_index("email", unique=True)
-            products_collection.create_index([("title", "text"), ("description", "text")])
+            ensure_indexes(users_collection, [
+                ("email_1", "email", {'unique': True})
+            ])
+            ensure_indexes(products_collection, [
+                ("title_text_description_text", [("title", "text"), ("description", "text")], {}),
+                ("id_1", "id", {'unique': True}),
+                ("createdAt_-1", [("createdAt", -1)], {})
+            ])
             if ENV == 'development':
                 app.logger.info("✅ Database indexes created")
         except Exception as e:
@@ -66,15 +147,109 @@ def init_database():
             app.logger.error(f"❌ Database connection failed: {str(e)[:50]}...")
         else:
             app.logger.error("Database connection failed")
+        # Don't leak the failed client's pool and monitor threads
+        if client is not None:
+            client.close()
         # Return None values to handle gracefully
         return None, None, None
 
-# Initialize database
-db, users_collection, products_collection = init_database()
+# Database handles are created lazily, once per process, on first use. This keeps
+# the Mongo handshake out of import time and off any pre-fork master process.
+# After a failed connection attempt, callers get (None, None, None) immediately
+# for DB_RETRY_INTERVAL seconds instead of each waiting out a new attempt.
+DB_RETRY_INTERVAL = 5
+_db_handles = None
+_db_failed_at = None
+_db_lock = threading.Lock()
+
+def _db_backing_off():
+    return _db_failed_at is not None and time.monotonic() - _db_failed_at < DB_RETRY_INTERVAL
+
+def get_db():
+    """Return (db, users_collection, products_collection), connecting on first call"""
+    global _db_handles, _db_failed_at
+
+    handles = _db_handles
+    if handles is not None:
+        return handles
+
+    if _db_backing_off():
+        return None, None, None
+
+    # Only the very first connection is waited on; once an attempt has failed,
+    # threads don't queue behind a retry that is already in progress
+    if not _db_lock.acquire(blocking=_db_failed_at is None):
+        return None, None, None
+
+    try:
+        if _db_handles is not None:
+            return _db_handles
+        # Threads that waited on a failed first attempt share its result
+        if _db_backing_off():
+            return None, None, None
+
+        handles = init_database()
+        if handles[0] is None:
+            _db_failed_at = time.monotonic()
+            return handles
+
+        _db_handles = handles
+        _db_failed_at = None
+        return handles
+    finally:
+        _db_lock.release()
+
+# Decoded token -> user cache, so repeat requests skip jwt.decode and the user lookup
+TOKEN_CACHE_TTL = 60
+_token_cache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL)
+_token_cache_lock = threading.RLock()
+
+# Read-through cache for single product lookups, invalidated on update/delete.
+# Opt-in with PRODUCT_CACHE=1, for single-worker deployments only: the cache is
+# per process, so with several workers an update would leave stale copies in the others.
+PRODUCT_CACHE_TTL = 60
+PRODUCT_CACHE_ENABLED = os.getenv('PRODUCT_CACHE', '0') == '1'
+_product_cache = TTLCache(maxsize=1024, ttl=PRODUCT_CACHE_TTL)
+_product_cache_lock = threading.RLock()
+# Bumped on every invalidation so an in-flight miss never re-stores a stale document
+_product_cache_version = 0
+
+def invalidate_product_cache(product_id):
+    global _product_cache_version
+    with _product_cache_lock:
+        _product_cache.pop(product_id, None)
+        _product_cache_version += 1
+
+# Issued tokens are reused per (user, hour) so login storms don't re-sign every time
+ISSUED_TOKEN_TTL = 3600
+_issued_tokens = TTLCache(maxsize=10000, ttl=ISSUED_TOKEN_TTL)
+_issued_tokens_lock = threading.RLock()
+
+def issue_token(user_id, email, now=None):
+    """Return the user's JWT for the current hour, signing a new one only when needed"""
+    issued_at = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+    key = (user_id, issued_at)
+
+    with _issued_tokens_lock:
+        token = _issued_tokens.get(key)
+
+    if token is None:
+        token = _jwt.encode({
+            'user_id': user_id,
+            'email': email,
+            'iat': issued_at,
+            'exp': issued_at + timedelta(hours=24)
+        }, _jwt_key, algorithm=JWT_ALGORITHM)
+
+        with _issued_tokens_lock:
+            _issued_tokens[key] = token
+
+    return token
 
 def auth_middleware(f):
     @wraps(f)
     def decorated(*args, **kwargs):
+        _, users_collection, _ = get_db()
         # FIXED: Use 'is None' instead of 'not users_collection'
         if users_collection is None:
             return jsonify({'error': 'Database unavailable'}), 503
@@ -91,11 +266,24 @@ def auth_middleware(f):
         if not token:
             return jsonify({'error': 'Token is missing'}), 401
 
+        with _token_cache_lock:
+            cached = _token_cache.get(token)
+
+        # Entries never outlive the token itself, even inside the cache TTL
+        if cached is not None and cached[1] > time.time():
+            return f(cached[0], *args, **kwargs)
+
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            data = _jwt.decode(token, _jwt_key, algorithms=[JWT_ALGORITHM])
+            if not ObjectId.is_valid(data.get('user_id')):
+                return jsonify({'error': 'Token is invalid'}), 401
+
             current_user = users_collection.find_one({'_id': ObjectId(data['user_id'])})
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
+
+            with _token_cache_lock:
+                _token_cache[token] = (current_user, data.get('exp', 0))
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
         except jwt.InvalidTokenError:
@@ -108,72 +296,96 @@ def auth_middleware(f):
 
     return decorated
 
-def validate_auth_data(data, is_login=False):
-    errors = {}
-
-    if not is_login:
-        name = data.get('name', '').strip()
-        if not name:
-            errors['name'] = 'Name is required'
-        elif len(name) < 2:
-            errors['name'] = 'Name must be at least 2 characters long'
-
-    email = data.get('email', '').strip().lower()
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not email:
-        errors['email'] = 'Email is required'
-    elif not re.match(email_pattern, email):
-        errors['email'] = 'Must be a valid email format'
-
-    password = data.get('password', '')
-    if not password:
-        errors['password'] = 'Password is required'
-    elif len(password) < 6:
-        errors['password'] = 'Password must be at least 6 characters long'
-
-    return errors
-
-def validate_registration_data(data):
-    errors = {}
-
-    full_name = data.get('fullName', '').strip()
-    if not full_name:
-        errors['fullName'] = 'Full Name is required'
-    elif len(full_name) < 2:
-        errors['fullName'] = 'Full Name must be at least 2 characters long'
-
-    email = data.get('email', '').strip().lower()
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not email:
-        errors['email'] = 'Email is required'
-    elif not re.match(email_pattern, email):
-        errors['email'] = 'Must be a valid email format'
-
-    phone = data.get('phone', '').strip()
-    phone_digits = re.sub(r'\D', '', phone)
-    if not phone:
-        errors['phone'] = 'Phone number is required'
-    elif len(phone_digits) < 10 or len(phone_digits) > 15:
-        errors['phone'] = 'Phone must contain 10 to 15 digits only'
-    elif not phone_digits.isdigit():
-        errors['phone'] = 'Phone must contain digits only'
-
-    password = data.get('password', '')
-    if not password:
-        errors['password'] = 'Password is required'
-    elif len(password) < 6:
-        errors['password'] = 'Password must be at least 6 characters long'
-
-    confirm_password = data.get('confirmPassword', '')
-    if not confirm_password:
-        errors['confirmPassword'] = 'Confirm Password is required'
-    elif password != confirm_password:
-        errors['confirmPassword'] = 'Passwords do not match'
-
-    return errors
+def _invalid(message):
+    return PydanticCustomError('invalid', message)
+
+class LoginPayload(BaseModel):
+    """Login body; email is returned stripped and lowercased"""
+    model_config = ConfigDict(validate_default=True)
+
+    email: str = ''
+    password: str = ''
+
+    @field_validator('email')
+    @classmethod
+    def check_email(cls, value):
+        value = value.strip().lower()
+        if not value:
+            raise _invalid('Email is required')
+        if not EMAIL_PATTERN.match(value):
+            raise _invalid('Must be a valid email format')
+        return value
+
+    @field_validator('password')
+    @classmethod
+    def check_password(cls, value):
+        if not value:
+            raise _invalid('Password is required')
+        if len(value) < 6:
+            raise _invalid('Password must be at least 6 characters long')
+        return value
+
+class AuthRegisterPayload(LoginPayload):
+    """Body for /api/auth/register; name is returned stripped"""
+    name: str = ''
+
+    @field_validator('name')
+    @classmethod
+    def check_name(cls, value):
+        value = value.strip()
+        if not value:
+            raise _invalid('Name is required')
+        if len(value) < 2:
+            raise _invalid('Name must be at least 2 characters long')
+        return value
+
+class UserRegistrationPayload(LoginPayload):
+    """Body for /api/register; phone is returned as digits only"""
+    fullName: str = ''
+    phone: str = ''
+    confirmPassword: str = ''
+
+    @field_validator('fullName')
+    @classmethod
+    def check_full_name(cls, value):
+        value = value.strip()
+        if not value:
+            raise _invalid('Full Name is required')
+        if len(value) < 2:
+            raise _invalid('Full Name must be at least 2 characters long')
+        return value
+
+    @field_validator('phone')
+    @classmethod
+    def check_phone(cls, value):
+        value = value.strip()
+        if not value:
+            raise _invalid('Phone number is required')
+        digits = NON_DIGIT_PATTERN.sub('', value)
+        if len(digits) < 10 or len(digits) > 15:
+            raise _invalid('Phone must contain 10 to 15 digits only')
+        return digits
+
+    @field_validator('confirmPassword')
+    @classmethod
+    def check_confirm_password(cls, value, info):
+        if not value:
+            raise _invalid('Confirm Password is required')
+        # password is only in info.data when it passed its own validation
+        if 'password' in info.data and value != info.data['password']:
+            raise _invalid('Passwords do not match')
+        return value
+
+def format_validation_errors(exc):
+    """Flatten a pydantic ValidationError into the {field: message} shape clients expect"""
+    return {
+        (str(err['loc'][0]) if err['loc'] else 'body'): err['msg']
+        for err in exc.errors()
+    }
 
 @app.route('/api/auth/register', methods=['POST'])
 def register_jwt():
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -184,38 +396,37 @@ def register_jwt():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        validation_errors = validate_auth_data(data)
-        if validation_errors:
-            return jsonify({
-                'error': 'Validation failed',
-                'errors': validation_errors
-            }), 400
-
-        existing_user = users_collection.find_one({'email': data['email'].strip().lower()})
-        if existing_user:
+        try:
+            payload = AuthRegisterPayload.model_validate(data)
+        except ValidationError as e:
             return jsonify({
                 'error': 'Validation failed',
-                'errors': {'email': 'Email already registered'}
+                'errors': format_validation_errors(e)
             }), 400
 
-        hashed_password = generate_password_hash(data['password'])
+        now = datetime.utcnow()
+        hashed_password = generate_password_hash(payload.password, method=PASSWORD_HASH_METHOD)
 
         user_data = {
-            'name': data['name'].strip(),
-            'email': data['email'].strip().lower(),
+            'name': payload.name,
+            'email': payload.email,
             'password': hashed_password,
-            'createdAt': datetime.utcnow(),
+            'createdAt': now,
             'isActive': True
         }
 
-        result = users_collection.insert_one(user_data)
+        # The unique email index rejects duplicates atomically
+        try:
+            result = users_collection.insert_one(user_data)
+        except DuplicateKeyError:
+            return jsonify({
+                'error': 'Validation failed',
+                'errors': {'email': 'Email already registered'}
+            }), 400
+
         user_id = str(result.inserted_id)
 
-        token = jwt.encode({
-            'user_id': user_id,
-            'email': user_data['email'],
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm='HS256')
+        token = issue_token(user_id, payload.email, now)
 
         return jsonify({
             'message': 'User registered successfully',
@@ -237,6 +448,7 @@ def register_jwt():
 
 @app.route('/api/auth/login', methods=['POST'])
 def login_jwt():
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -247,23 +459,20 @@ def login_jwt():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        validation_errors = validate_auth_data(data, is_login=True)
-        if validation_errors:
+        try:
+            payload = LoginPayload.model_validate(data)
+        except ValidationError as e:
             return jsonify({
                 'error': 'Validation failed',
-                'errors': validation_errors
+                'errors': format_validation_errors(e)
             }), 400
 
-        user = users_collection.find_one({'email': data['email'].strip().lower()})
+        user = users_collection.find_one({'email': payload.email})
 
-        if not user or not check_password_hash(user['password'], data['password']):
+        if not user or not check_password_hash(user['password'], payload.password):
             return jsonify({'error': 'Invalid email or password'}), 401
 
-        token = jwt.encode({
-            'user_id': str(user['_id']),
-            'email': user['email'],
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm='HS256')
+        token = issue_token(str(user['_id']), user['email'])
 
         return jsonify({
             'message': 'Login successful',
@@ -297,6 +506,7 @@ def verify_token(current_user):
 @app.route('/api/products', methods=['GET'])
 @auth_middleware
 def get_products(current_user):
+    _, _, products_collection = get_db()
     # FIXED: Use 'is None' instead of 'not products_collection'
     if products_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -328,21 +538,36 @@ def get_products(current_user):
 
         skip = (page - 1) * limit
 
-        cursor = products_collection.find(query_filter)
-
-        if sort_criteria:
-            cursor = cursor.sort(sort_criteria)
-
-        cursor = cursor.skip(skip).limit(limit)
+        if query_filter:
+            # Page and total in one round-trip
+            page_stages = []
+            if sort_criteria:
+                page_stages.append({'$sort': dict(sort_criteria)})
+            page_stages.extend([
+                {'$skip': skip},
+                {'$limit': limit},
+                {'$project': PRODUCT_LIST_PROJECTION}
+            ])
+
+            result = next(products_collection.aggregate([
+                {'$match': query_filter},
+                {'$facet': {
+                    'data': page_stages,
+                    'total': [{'$count': 'n'}]
+                }}
+            ]))
+            products = result['data']
+            total_count = result['total'][0]['n'] if result['total'] else 0
+        else:
+            cursor = products_collection.find(query_filter, projection=PRODUCT_LIST_PROJECTION)
 
-        products = list(cursor)
+            if sort_criteria:
+                cursor = cursor.sort(sort_criteria)
 
-        for product in products:
-            product['_id'] = str(product['_id'])
-            if 'createdAt' in product:
-                product['createdAt'] = product['createdAt'].isoformat()
+            products = list(cursor.skip(skip).limit(limit))
+            # Unfiltered count comes from collection metadata instead of a scan
+            total_count = products_collection.estimated_document_count()
 
-        total_count = products_collection.count_documents(query_filter)
         total_pages = (total_count + limit - 1) // limit
 
         return jsonify({
@@ -372,6 +597,7 @@ def get_products(current_user):
 @app.route('/api/products', methods=['POST'])
 @auth_middleware
 def create_product(current_user):
+    _, _, products_collection = get_db()
     # FIXED: Use 'is None' instead of 'not products_collection'
     if products_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -431,24 +657,43 @@ def create_product(current_user):
 @app.route('/api/products/<product_id>', methods=['GET'])
 @auth_middleware
 def get_product(current_user, product_id):
+    _, _, products_collection = get_db()
     # FIXED: Use 'is None' instead of 'not products_collection'
     if products_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
 
     try:
-        product = products_collection.find_one({'id': product_id})
+        product = None
+        if PRODUCT_CACHE_ENABLED:
+            with _product_cache_lock:
+                product = _product_cache.get(product_id)
+                cache_version = _product_cache_version
 
-        if not product:
-            return jsonify({'error': 'Product not found'}), 404
+        if product is None:
+            product = products_collection.find_one({'id': product_id})
 
-        product['_id'] = str(product['_id'])
-        if 'createdAt' in product:
-            product['createdAt'] = product['createdAt'].isoformat()
+            if not product:
+                return jsonify({'error': 'Product not found'}), 404
 
-        return jsonify({
+            product['_id'] = str(product['_id'])
+            if 'createdAt' in product:
+                product['createdAt'] = product['createdAt'].isoformat()
+
+            if PRODUCT_CACHE_ENABLED:
+                with _product_cache_lock:
+                    # Skip the fill if an update/delete landed while we were reading
+                    if _product_cache_version == cache_version:
+                        _product_cache[product_id] = product
+
+        response = jsonify({
             'message': 'Product retrieved successfully',
             'product': product
-        }), 200
+        })
+        # Clients revalidate every time (products can change from any worker);
+        # the ETag turns an unchanged product into an empty 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
 
     except Exception as e:
         app.logger.error(f"Get product error: {str(e)[:50]}...")
@@ -460,6 +705,7 @@ def get_product(current_user, product_id):
 @app.route('/api/products/<product_id>', methods=['PUT'])
 @auth_middleware
 def update_product(current_user, product_id):
+    _, _, products_collection = get_db()
     # FIXED: Use 'is None' instead of 'not products_collection'
     if products_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -470,11 +716,6 @@ def update_product(current_user, product_id):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        product = products_collection.find_one({'id': product_id})
-
-        if not product:
-            return jsonify({'error': 'Product not found'}), 404
-
         update_data = {}
         if 'title' in data:
             update_data['title'] = data['title'].strip()
@@ -492,9 +733,17 @@ def update_product(current_user, product_id):
 
         update_data['updatedAt'] = datetime.utcnow()
 
-        products_collection.update_one({'id': product_id}, {'$set': update_data})
+        updated_product = products_collection.find_one_and_update(
+            {'id': product_id},
+            {'$set': update_data},
+            return_document=ReturnDocument.AFTER
+        )
+
+        if not updated_product:
+            return jsonify({'error': 'Product not found'}), 404
+
+        invalidate_product_cache(product_id)
 
-        updated_product = products_collection.find_one({'id': product_id})
         updated_product['_id'] = str(updated_product['_id'])
         if 'createdAt' in updated_product:
             updated_product['createdAt'] = updated_product['createdAt'].isoformat()
@@ -516,17 +765,21 @@ def update_product(current_user, product_id):
 @app.route('/api/products/<product_id>', methods=['DELETE'])
 @auth_middleware
 def delete_product(current_user, product_id):
+    _, _, products_collection = get_db()
     # FIXED: Use 'is None' instead of 'not products_collection'
     if products_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
 
     try:
-        product = products_collection.find_one({'id': product_id})
+        product = products_collection.find_one_and_delete(
+            {'id': product_id},
+            projection={'id': 1, 'title': 1}
+        )
 
         if not product:
             return jsonify({'error': 'Product not found'}), 404
 
-        products_collection.delete_one({'id': product_id})
+        invalidate_product_cache(product_id)
 
         return jsonify({
             'message': 'Product deleted successfully',
@@ -545,6 +798,7 @@ def delete_product(current_user, product_id):
 
 @app.route('/api/register', methods=['POST'])
 def register_user():
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -555,30 +809,31 @@ def register_user():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
 
-        validation_errors = validate_registration_data(data)
-        if validation_errors:
-            return jsonify({
-                'error': 'Validation failed',
-                'errors': validation_errors
-            }), 400
-
-        existing_user = users_collection.find_one({'email': data['email'].strip().lower()})
-        if existing_user:
+        try:
+            payload = UserRegistrationPayload.model_validate(data)
+        except ValidationError as e:
             return jsonify({
                 'error': 'Validation failed',
-                'errors': {'email': 'Email already registered'}
+                'errors': format_validation_errors(e)
             }), 400
 
         user_data = {
-            'fullName': data['fullName'].strip(),
-            'email': data['email'].strip().lower(),
-            'phone': re.sub(r'\D', '', data['phone'].strip()),
-            'password': generate_password_hash(data['password']),
+            'fullName': payload.fullName,
+            'email': payload.email,
+            'phone': payload.phone,
+            'password': generate_password_hash(payload.password, method=PASSWORD_HASH_METHOD),
             'createdAt': datetime.utcnow(),
             'isActive': True
         }
 
-        result = users_collection.insert_one(user_data)
+        # The unique email index rejects duplicates atomically
+        try:
+            result = users_collection.insert_one(user_data)
+        except DuplicateKeyError:
+            return jsonify({
+                'error': 'Validation failed',
+                'errors': {'email': 'Email already registered'}
+            }), 400
 
         response_data = {
             'id': str(result.inserted_id),
@@ -602,6 +857,7 @@ def register_user():
 
 @app.route('/api/login', methods=['POST'])
 def login_user():
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
@@ -612,7 +868,8 @@ def login_user():
         if not data or not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
 
-        user = users_collection.find_one({'email': data['email'].strip().lower()})
+        email = data['email'].strip().lower()
+        user = users_collection.find_one({'email': email})
 
         if not user or not check_password_hash(user['password'], data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
@@ -638,23 +895,69 @@ def login_user():
 
 @app.route('/api/users', methods=['GET'])
 def get_all_users():
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
 
     try:
-        users = list(users_collection.find({}, {'password': 0}))
+        if 'page' in request.args or 'limit' in request.args:
+            page = int(request.args.get('page', 1))
+            limit = int(request.args.get('limit', 10))
+
+            if page < 1:
+                page = 1
+            if limit < 1 or limit > 100:
+                limit = 10
+
+            # ObjectId/datetime values are encoded by the orjson provider
+            users = list(
+                users_collection.find({}, {'password': 0})
+                .sort('_id', 1)
+                .skip((page - 1) * limit)
+                .limit(limit)
+            )
+
+            total_count = users_collection.estimated_document_count()
+            total_pages = (total_count + limit - 1) // limit
 
-        for user in users:
-            user['_id'] = str(user['_id'])
-            if 'createdAt' in user:
-                user['createdAt'] = user['createdAt'].isoformat()
-
-        return jsonify({
-            'message': 'Users retrieved successfully',
-            'users': users,
-            'count': len(users)
-        }), 200
+            return jsonify({
+                'message': 'Users retrieved successfully',
+                'users': users,
+                'count': len(users),
+                'pagination': {
+                    'currentPage': page,
+                    'totalPages': total_pages,
+                    'totalItems': total_count,
+                    'itemsPerPage': limit,
+                    'hasNext': page < total_pages,
+                    'hasPrev': page > 1
+                }
+            }), 200
+
+        # Full dump: stream documents straight from the cursor so memory stays flat.
+        # The 200 status is sent before the cursor is drained, so a failure partway
+        # through reaches the client as a truncated body with status 200; it is
+        # logged here since the handler's except block has already returned.
+        cursor = users_collection.find({}, {'password': 0})
+
+        def generate():
+            yield '{"message":"Users retrieved successfully","users":['
+            count = 0
+            try:
+                for user in cursor:
+                    if count:
+                        yield ','
+                    yield app.json.dumps(user)
+                    count += 1
+            except Exception as e:
+                app.logger.error(f"Get users stream error: {str(e)[:50]}...")
+                return
+            finally:
+                cursor.close()
+            yield f'],"count":{count}}}'
+
+        return Response(stream_with_context(generate()), status=200, mimetype='application/json')
 
     except Exception as e:
         app.logger.error(f"Get users error: {str(e)[:50]}...")
@@ -665,10 +968,14 @@ def get_all_users():
 
 @app.route('/api/users/<user_id>', methods=['GET'])
 def get_user(user_id):
+    _, users_collection, _ = get_db()
     # FIXED: Use 'is None' instead of 'not users_collection'
     if users_collection is None:
         return jsonify({'error': 'Service temporarily unavailable'}), 503
 
+    if not ObjectId.is_valid(user_id):
+        return jsonify({'error': 'Invalid user id'}), 400
+
     try:
         user = users_collection.find_one({'_id': ObjectId(user_id)}, {'password': 0})
 
@@ -697,6 +1004,7 @@ def health_check():
         status = 'healthy'
         db_status = 'connected'
 
+        db, _, _ = get_db()
         # FIXED: Use 'is not None' instead of 'if db'
         if db is not None:
             db.command('ping')
@@ -704,13 +1012,16 @@ def health_check():
             status = 'degraded'
             db_status = 'unavailable'
 
-        return jsonify({
+        response = jsonify({
             'status': status,
             'message': 'API is running',
             'database': db_status,
             'timestamp': datetime.utcnow().isoformat(),
             'environment': ENV
-        }), 200
+        })
+        # Let proxies absorb load balancer polling for a few seconds
+        response.headers['Cache-Control'] = 'public, max-age=5'
+        return response
     except Exception as e:
         app.logger.error(f"Health check error: {str(e)[:50]}...")
         return jsonify({
@@ -770,12 +1081,23 @@ if __name__ == '__main__':
         print(f"🚀 Starting server on port {port}")
         print(f"🔧 Debug mode: {debug_mode}")
         print(f"🌍 Environment: {ENV}")
-        if db is not None:
+        if get_db()[0] is not None:
             print("✅ Database connection established")
         else:
             print("❌ Database connection failed")
+
+        # Werkzeug dev server is for local development only
+        app.run(debug=debug_mode, host='0.0.0.0', port=port)
     else:
         # Production: minimal logging
         print("Server starting...")
 
-    app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
+        # Hand off to gunicorn (gthread workers, see gunicorn.conf.py), equivalent to:
+        #   gunicorn -c gunicorn.conf.py app:app
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        os.execv(sys.executable, [
+            sys.executable, '-m', 'gunicorn',
+            '--chdir', base_dir,
+            '-c', os.path.join(base_dir, 'gunicorn.conf.py'),
+            'app:app'
+        ])
\ No newline at end of file
@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# Threaded workers: pymongo and PBKDF2 hashing release the GIL, so each
+# worker overlaps many in-flight Mongo round-trips instead of blocking on one
+worker_class = 'gthread'
+# cpu_count() reports the host's cores inside a container, not the instance's
+# share, so keep a small fixed default and scale up explicitly via WEB_CONCURRENCY
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+timeout = 30
+keepalive = 5
+
+# Load the app in each worker after fork so every worker owns its MongoClient pool
+preload_app = False
+
+
+def post_worker_init(worker):
+    # Connect each worker's pool as soon as it boots rather than on its first request
+    from app import get_db
+    get_db()